@@ -0,0 +1,356 @@
+import yfinance as yf
+import pandas as pd
+import numpy as np
+try:
+    import numba
+except ImportError:  # bottleneck's moving windows stand in for the Numba kernels
+    numba = None
+    import bottleneck as bn
+from datetime import date
+from pathlib import Path
+import logging
+from collections import namedtuple
+from enum import IntEnum
+import functools
+import csv
+import warnings
+
+def setup_logging():
+    """Configure logging for the scanner"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+def load_stock_list(filename):
+    """Load stock symbols from a text file"""
+    try:
+        with open(filename, 'r') as file:
+            return [line.strip() for line in file if line.strip()]
+    except FileNotFoundError:
+        logging.error(f"Stock list file {filename} not found")
+        return []
+
+_CACHE_DIR = Path('.vcp_cache')
+_DOWNLOAD_THREADS = 16  # Concurrent Yahoo requests, bounded to avoid HTTP 429s
+
+# Price histories by (symbol, period), read by the memoized metric calculations
+_price_data = {}
+
+def _cache_path(symbol, period, day):
+    """Location of the cached price history for a symbol on a given day"""
+    return _CACHE_DIR / f"{symbol}_{period}_{day}.parquet"
+
+def _purge_stale_cache(day):
+    """Remove cache files written before the given day"""
+    for path in _CACHE_DIR.glob('*'):
+        if not path.stem.endswith(f"_{day}"):
+            path.unlink()
+
+def download_stock_data(symbols, period='1y'):
+    """
+    Fetch stock data for all symbols from Yahoo Finance in one batch
+    Histories already downloaded today are read from the local cache
+    """
+    today = date.today()
+    _CACHE_DIR.mkdir(exist_ok=True)
+    _purge_stale_cache(today)
+    
+    stock_data = {}
+    missing = []
+    for symbol in symbols:
+        cache = _cache_path(symbol, period, today)
+        if cache.exists():
+            stock_data[symbol] = pd.read_parquet(cache)
+        else:
+            missing.append(symbol)
+    
+    if missing:
+        try:
+            data = yf.download(
+                missing, period=period, group_by='ticker', threads=_DOWNLOAD_THREADS,
+                auto_adjust=True, progress=False
+            )
+        except Exception as e:
+            logging.error(f"Error fetching stock data: {str(e)}")
+            data = pd.DataFrame()
+        
+        for symbol in missing:
+            ticker = symbol.upper()  # yf.download keys its result by upper-case ticker
+            df = data[ticker].dropna() if ticker in data else None
+            if df is None or df.empty:
+                logging.warning(f"No data found for {symbol}")
+                continue
+            df.to_parquet(_cache_path(symbol, period, today))
+            stock_data[symbol] = df
+    
+    _price_data.update({(symbol, period): df for symbol, df in stock_data.items()})
+    return stock_data
+
+# Float32 or float64 prices, int64 volumes and the first row of each symbol
+_KERNEL_SIGNATURES = [
+    '(float32[:, ::1], int64[:, ::1], int64[::1])',
+    '(float64[:, ::1], int64[:, ::1], int64[::1])',
+]
+
+@functools.cache
+def make_vcp_kernel(ma_window_short, ma_window_long, volatility_window, volume_window):
+    """
+    Build the rolling metrics kernel for one set of window lengths
+    The windows are compile-time constants of the returned function, so each
+    combination is compiled once (and cached on disk) with the loop bounds
+    specialized for it
+    """
+    s, l, vw, volw = ma_window_short, ma_window_long, volatility_window, volume_window
+
+    if numba is None:
+        def kernel(close, volume, start):
+            """
+            Same rolling metrics as the Numba kernel using bottleneck; the NaN
+            padding above short histories keeps their windows incomplete, and
+            so NaN, until a symbol has enough bars
+            """
+            close = close.astype(np.float64)  # bottleneck accumulates in the input dtype
+            ma_s = bn.move_mean(close, s, axis=0)
+            ma_l = bn.move_mean(close, l, axis=0)
+            vol = bn.move_std(close, vw, axis=0, ddof=1)  # sample std, like pandas
+            vol_sum = bn.move_sum(volume, volw, axis=0).astype(np.float32)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                vol_ratio = volume.astype(np.float32) * np.float32(volw) / vol_sum
+            # Volume is padded with zeros rather than NaN, so windows reaching
+            # above a symbol's first bar are blanked here
+            vol_ratio[np.arange(len(volume))[:, None] < start + volw - 1] = np.nan
+            return ma_s, ma_l, vol, vol_ratio
+        return kernel
+
+    # Explicit signatures compile the kernel as soon as it is built, and
+    # cache=True stores the machine code so later runs load it instead
+    @numba.njit(_KERNEL_SIGNATURES, cache=True, fastmath=True, error_model='numpy')
+    def kernel(close, volume, start):
+        """
+        Rolling MAs, volatility and volume ratio for every symbol in a single pass
+        Arrays are (days, symbols); column j only holds data from row start[j] on
+        """
+        n, m = close.shape
+        ma_s = np.full((n, m), np.nan, close.dtype)
+        ma_l = np.full((n, m), np.nan, close.dtype)
+        vol = np.full((n, m), np.nan, close.dtype)
+        vol_ratio = np.full((n, m), np.nan, np.float32)
+
+        # Running state stays in float64 even when the prices are float32
+        sum_s = np.zeros(m)
+        sum_l = np.zeros(m)
+        vol_sum = np.zeros(m, np.int64)  # exact integer running sum
+        mean = np.zeros(m)  # Welford state for the volatility window
+        m2 = np.zeros(m)
+        for i in range(n):
+            for j in range(m):
+                k = i - start[j]  # bars seen so far for this symbol, minus one
+                if k < 0:
+                    continue
+                x = close[i, j]
+
+                sum_s[j] += x
+                if k >= s:
+                    sum_s[j] -= close[i - s, j]
+                if k >= s - 1:
+                    ma_s[i, j] = sum_s[j] / s
+
+                sum_l[j] += x
+                if k >= l:
+                    sum_l[j] -= close[i - l, j]
+                if k >= l - 1:
+                    ma_l[i, j] = sum_l[j] / l
+
+                if k >= vw:
+                    # Window is full: swap the leaving value for the entering one
+                    old = close[i - vw, j]
+                    new_mean = mean[j] + (x - old) / vw
+                    m2[j] += (x - old) * (x - new_mean + old - mean[j])
+                    mean[j] = new_mean
+                else:
+                    delta = x - mean[j]
+                    mean[j] += delta / (k + 1)
+                    m2[j] += delta * (x - mean[j])
+                if k >= vw - 1:
+                    vol[i, j] = np.sqrt(max(m2[j], 0.0) / (vw - 1))  # sample std, like pandas
+
+                vol_sum[j] += volume[i, j]
+                if k >= volw:
+                    vol_sum[j] -= volume[i - volw, j]
+                if k >= volw - 1:
+                    # float32 is plenty for a ratio compared against a threshold
+                    vol_ratio[i, j] = np.float32(volume[i, j]) * np.float32(volw) / np.float32(vol_sum[j])
+
+        return ma_s, ma_l, vol, vol_ratio
+
+    return kernel
+
+# Build the kernels for the windows the scanners use up front: 20/50-day
+# (vcp.py, vcp2.py and the longer.py defaults) and 30/60-day (longer.py example)
+for _windows in ((20, 50, 20, 50), (30, 60, 20, 50)):
+    make_vcp_kernel(*_windows)
+
+class _Column(IntEnum):
+    """Position of each price history column in the stacked array"""
+    CLOSE = 0
+    LOW = 1
+    VOLUME = 2
+
+_STACKED_COLUMNS = ['Close', 'Low', 'Volume']  # ordered like _Column
+
+def _stack_history(frames, days):
+    """
+    Stack the Close, Low and Volume columns of each frame into a
+    (column, days, symbols) array indexed by _Column, aligned on the last
+    bar and padded with NaN where a symbol has a shorter history
+    """
+    stacked = np.full((len(_Column), days, len(frames)), np.nan)
+    for j, df in enumerate(frames):
+        stacked[:, days - len(df):, j] = df[_STACKED_COLUMNS].to_numpy(dtype=np.float64).T
+    return stacked
+
+# Recent rows of the arrays the VCP criteria are evaluated on, each shaped
+# (days, symbols)
+VCPArrays = namedtuple('VCPArrays', 'close low ma_s ma_l vol vol_ratio')
+
+# Remark for each VCP criterion, in the order check_vcp_pattern lists them
+_REMARK_STRINGS = ('Price Above Mas', 'Decreasing Volatility', 'Higher Lows', 'Volume Dry Up')
+
+# Joined remarks for every combination of criteria met, indexed by a bit
+# mask holding one bit per criterion in _REMARK_STRINGS order
+_REMARKS_BY_MASK = np.array([
+    ", ".join(remark for bit, remark in enumerate(_REMARK_STRINGS) if mask >> bit & 1) or "No triggers met"
+    for mask in range(1 << len(_REMARK_STRINGS))
+], dtype=object)
+
+@functools.lru_cache(maxsize=32)
+def calculate_vcp_metrics(symbols, last_bars, period='1y', recent_days=60, ma_window_short=20, ma_window_long=50, volatility_window=20, volume_window=50):
+    """
+    Calculate metrics needed for VCP pattern identification for all symbols
+    whose histories download_stock_data has fetched for the given period
+    Memoized on the symbols, the timestamps of their newest bars and the
+    period, so cached results are recomputed as soon as new data arrives
+    Returns: VCPArrays holding the last recent_days rows of close, low,
+    short/long MAs, volatility and volume ratio. The arrays are shared
+    between calls and so marked read-only
+    """
+    frames = [_price_data[symbol, period] for symbol in symbols]
+    days = max(len(df) for df in frames)
+    if days < ma_window_long:  # Need sufficient data for analysis
+        return None
+    
+    # One array conversion per frame, then plain slicing per column
+    history = _stack_history(frames, days)
+    # Prices only need float32 precision, which halves the memory traffic
+    close = history[_Column.CLOSE].astype(np.float32)
+    low = history[_Column.LOW].astype(np.float32)
+    # Volumes are whole shares, kept as int64 so the kernel's running sum is
+    # exact; the NaN padding becomes 0, which the kernel never reads
+    volume = np.nan_to_num(history[_Column.VOLUME]).astype(np.int64)
+    start = np.array([days - len(df) for df in frames], dtype=np.int64)
+    
+    # MAs, volatility and volume ratio in one pass
+    kernel = make_vcp_kernel(ma_window_short, ma_window_long, volatility_window, volume_window)
+    ma_short, ma_long, volatility, volume_ratio = kernel(close, volume, start)
+    
+    recent = VCPArrays(*(a[-recent_days:] for a in (close, low, ma_short, ma_long, volatility, volume_ratio)))
+    for a in recent:
+        a.setflags(write=False)
+    return recent
+
+def check_vcp_pattern(arrays, recent_days=60, volatility_threshold=0.8, volume_threshold=0.8):
+    """
+    Check which stocks exhibit VCP pattern characteristics
+    Takes: VCPArrays from calculate_vcp_metrics
+    Returns: dict of per-symbol arrays with pattern details and booleans
+    indicating if the pattern was found. Criteria are checked from the
+    highest weight down and each only for symbols that can still reach 75
+    points, so symbols ruled out early keep False for the criteria they
+    skipped and a partial pattern score
+    """
+    if arrays is None or len(arrays.close) < recent_days:
+        return {'vcp_found': False}
+    
+    close, low, ma_short, ma_long, volatility, volume_ratio = arrays
+    n = close.shape[1]
+    # Symbols that can still reach 75 points; those with fewer than
+    # recent_days bars are NaN-padded at the top and left out from the start
+    live = np.flatnonzero(~np.isnan(close[0]))
+    
+    # VCP Criteria
+    criteria = {
+        'price_above_mas': np.zeros(n, dtype=bool),  # Price above major moving averages
+        'decreasing_volatility': np.zeros(n, dtype=bool),  # Contracting volatility
+        'higher_lows': np.zeros(n, dtype=bool),  # Series of higher lows
+        'volume_dry_up': np.zeros(n, dtype=bool),  # Decreasing volume
+    }
+    pattern_score = np.zeros(n, dtype=np.int64)
+    
+    # Check if price is above moving averages (30 points)
+    last_price = close[-1]
+    met = (
+        (last_price[live] > ma_short[-1, live]) & 
+        (last_price[live] > ma_long[-1, live])
+    )
+    criteria['price_above_mas'][live] = met
+    pattern_score[live] += met * 30
+    live = live[pattern_score[live] + 70 >= 75]
+    
+    # Check for volume dry-up (20 points; nanmean skips the NaN ratios of
+    # short histories, like pandas mean)
+    recent_volume_avg = np.full(n, np.nan, volume_ratio.dtype)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        recent_volume_avg[live] = np.nanmean(volume_ratio[-10:, live], axis=0)
+    met = recent_volume_avg[live] < volume_threshold
+    criteria['volume_dry_up'][live] = met
+    pattern_score[live] += met * 20
+    live = live[pattern_score[live] + 50 >= 75]
+    
+    # Check for decreasing volatility (25 points)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol_change = volatility[-1, live] / volatility[-20, live]
+    met = vol_change < volatility_threshold
+    criteria['decreasing_volatility'][live] = met
+    pattern_score[live] += met * 25
+    live = live[pattern_score[live] + 25 >= 75]
+    
+    # Check for higher lows (25 points): 5-day lows ending on the last bar,
+    # 20 bars back and 40 bars back
+    low_1 = low[-5:, live].min(axis=0)
+    low_20 = low[-24:-19, live].min(axis=0)
+    low_40 = low[-44:-39, live].min(axis=0)
+    met = (
+        (low_1 > low_20) & 
+        (low_20 > low_40)
+    )
+    criteria['higher_lows'][live] = met
+    pattern_score[live] += met * 25
+    
+    # VCP pattern is considered valid if score is above 75
+    vcp_found = pattern_score >= 75
+    
+    # Prepare remarks for criteria met
+    mask = sum(met * (1 << bit) for bit, met in enumerate(criteria.values()))
+    remarks = _REMARKS_BY_MASK[mask]
+    
+    return {
+        'vcp_found': vcp_found,
+        'pattern_score': pattern_score,
+        'criteria_met': criteria,
+        'last_price': last_price,
+        'current_volatility': volatility[-1],
+        'volume_ratio': recent_volume_avg,
+        'remarks': remarks
+    }
+
+def save_results(rows, output_file):
+    """Stream result rows (dicts keyed by column) to CSV, writing each one as it is produced"""
+    with open(output_file, 'w', newline='') as f:
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)